@@ -6,17 +6,25 @@ Tracks processed files to avoid duplicates.
 """
 import sqlite3
 import os
-import csv
 import gzip
+import io
+import shutil
+import subprocess
+import tempfile
 import argparse
 import glob
 import logging
 import json
-import hashlib
 import re
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import chain, islice
 from datetime import datetime
 from pathlib import Path
 
+# Date-based log directory names (yyyy-mm-dd)
+_DATE_RE = re.compile(r'\d{4}-\d{2}-\d{2}\Z')
+
 # Setup logging
 def setup_logging(log_file=None, log_level=logging.INFO):
     """Configure logging to both file and console."""
@@ -36,26 +44,96 @@ def setup_logging(log_file=None, log_level=logging.INFO):
     )
     return logging.getLogger(__name__)
 
+# pigz decompresses considerably faster than Python's gzip module
+PIGZ = shutil.which('pigz')
+
+class PigzFile:
+    """Iterate the lines of a gzip file decompressed by a `pigz -dc` subprocess."""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._proc = subprocess.Popen([PIGZ, '-dc', filepath],
+                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._text = io.TextIOWrapper(self._proc.stdout, encoding='utf-8')
+
+    def __iter__(self):
+        # a plain loop rather than `yield from`, which would close the pipe
+        # when the header scan abandons its iterator
+        for line in self._text:
+            yield line
+        # raise on truncated/corrupt archives at EOF, like gzip.open does
+        err = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            raise OSError(f"pigz failed on {self.filepath}: {err.decode(errors='replace').strip()}")
+
+    def close(self):
+        self._text.close()
+        if self._proc.poll() is None:
+            self._proc.kill()
+        self._proc.wait()
+        self._proc.stderr.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 # Handle both compressed and uncompressed logs
 def get_file_handle(filepath):
     """Open a log file, handling both compressed and uncompressed formats."""
     if filepath.endswith('.gz'):
+        if PIGZ:
+            return PigzFile(filepath)
         return gzip.open(filepath, 'rt', encoding='utf-8')
     return open(filepath, 'r', encoding='utf-8')
 
+def get_file_signature(filepath, hash_contents=False):
+    """Identify a file by size, mtime and inode without reading its contents.
+
+    Zeek log filenames are timestamped and rotated logs are never rewritten,
+    so a stat-based signature is enough to detect already imported files.
+    With hash_contents, hash the file instead (for logs that get copied in
+    ways that change their mtime or inode).
+    """
+    if hash_contents:
+        try:
+            return get_file_hash(filepath)
+        except Exception as e:
+            logging.warning(f"Could not hash {filepath}: {e}")
+    st = os.stat(filepath)
+    return f"{st.st_size}:{st.st_mtime_ns}:{st.st_ino}"
+
+# Read size for content hashing
+HASH_CHUNK_SIZE = 1 << 20
+
+# BLAKE3 (SIMD, optional package) if available, otherwise SHA-256, which
+# hashlib accelerates with SHA extensions on CPUs that have them
+try:
+    from blake3 import blake3 as _hasher
+    _HASH_NAME = 'blake3'
+except ImportError:
+    from hashlib import sha256 as _hasher
+    _HASH_NAME = 'sha256'
+
 def get_file_hash(filepath):
-    """Generate a hash of the file for tracking purposes."""
-    hash_md5 = hashlib.md5()
-    try:
-        with open(filepath, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-    except Exception as e:
-        logging.warning(f"Could not hash {filepath}: {e}")
-        # Fallback: use filename and mtime
-        stat = os.stat(filepath)
-        return hashlib.md5(f"{filepath}:{stat.st_mtime}:{stat.st_size}".encode()).hexdigest()
+    """Hash the file contents, returned as '<algorithm>:<hexdigest>'."""
+    h = _hasher()
+    # reuse one buffer rather than allocating a bytes object per read
+    buf = bytearray(HASH_CHUNK_SIZE)
+    mv = memoryview(buf)
+    with open(filepath, 'rb') as f:
+        for n in iter(lambda: f.readinto(buf), 0):
+            h.update(mv[:n])
+    return f"{_HASH_NAME}:{h.hexdigest()}"
+
+def signature_kind(file_hash):
+    """Return 'stat', 'legacy' or the hash algorithm of a stored signature."""
+    head, sep, _ = file_hash.partition(':')
+    if not sep:
+        # bare MD5 digest written by older versions
+        return 'legacy'
+    return 'stat' if head.isdigit() else head
 
 def extract_table_name(filename):
     """Extract table name from Zeek log filename."""
@@ -76,6 +154,27 @@ def extract_table_name(filename):
     # sqlite doesn't like hyphens
     return table_name.replace('-', '_')
 
+def apply_performance_pragmas(cursor):
+    """Switch the connection to WAL mode with relaxed syncing for bulk imports."""
+    cursor.executescript('''
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-262144;
+        PRAGMA mmap_size=268435456;
+    ''')
+
+def apply_durable_pragmas(cursor):
+    """Switch back to the rollback journal with full syncing.
+
+    journal_mode is stored in the database file, so a database left in WAL
+    mode by an earlier run has to be switched back explicitly.
+    """
+    cursor.executescript('''
+        PRAGMA journal_mode=DELETE;
+        PRAGMA synchronous=FULL;
+    ''')
+
 def init_processed_files_table(cursor):
     """Create table to track processed files."""
     cursor.execute('''
@@ -87,102 +186,400 @@ def init_processed_files_table(cursor):
         )
     ''')
 
-def is_file_processed(cursor, filepath, file_hash):
+def load_processed_files(cursor):
+    """Load the processed files table into a {filepath: file_hash} dict."""
+    cursor.execute('SELECT filepath, file_hash FROM _processed_files')
+    return dict(cursor.fetchall())
+
+def is_file_processed(seen, filepath, file_hash):
     """Check if a file has already been processed."""
-    cursor.execute(
-        'SELECT file_hash FROM _processed_files WHERE filepath = ?',
-        (filepath,)
-    )
-    result = cursor.fetchone()
-    if result:
-        return result[0] == file_hash
-    return False
+    stored = seen.get(filepath)
+    if stored is None:
+        return False
+    # Signatures of different kinds can't be compared (rows written by older
+    # versions or with another --hash-contents setting); the path alone is
+    # enough to know those files were imported
+    if signature_kind(stored) != signature_kind(file_hash):
+        return True
+    return stored == file_hash
 
-def mark_file_processed(cursor, filepath, file_hash, rows_imported):
+def mark_file_processed(cursor, seen, filepath, file_hash, rows_imported):
     """Mark a file as processed."""
     cursor.execute('''
         INSERT OR REPLACE INTO _processed_files 
         (filepath, file_hash, processed_at, rows_imported)
         VALUES (?, ?, ?, ?)
     ''', (filepath, file_hash, datetime.now().isoformat(), rows_imported))
+    seen[filepath] = file_hash
+
+# (table_name, columns) already created during this run
+_created_tables = set()
+
+def table_ddl(table_name, columns):
+    """Return the CREATE TABLE statement for a log table."""
+    cols = ', '.join([f'"{c}" TEXT' for c in columns])
+    return f'CREATE TABLE IF NOT EXISTS "{table_name}" ({cols});'
 
 def create_table(cursor, table_name, columns):
-    """Create a table if it doesn't exist."""
+    """Create a table if it doesn't exist (once per run for each column set)."""
     if not columns:
         raise ValueError(f"No columns for {table_name}")
     
-    cols = ', '.join([f'"{c}" TEXT' for c in columns])
-    sql = f'CREATE TABLE IF NOT EXISTS "{table_name}" ({cols});'
-    cursor.execute(sql)
-
-def insert_data(cursor, table_name, columns, data):
-    """Insert data into a table."""
-    if not data:
+    key = (table_name, tuple(columns))
+    if key in _created_tables:
         return
-    
-    placeholders = ', '.join(['?' for _ in columns])
-    col_names = ', '.join([f'"{c}"' for c in columns])
-    sql = f'INSERT INTO "{table_name}" ({col_names}) VALUES ({placeholders});'
-    cursor.executemany(sql, data)
+    cursor.execute(table_ddl(table_name, columns))
+    _created_tables.add(key)
 
-def process_file(conn, cursor, log_path, table_name):
-    """Process a single log file and return number of rows imported."""
-    file_hash = get_file_hash(log_path)
-    
-    # Check if already processed
-    if is_file_processed(cursor, log_path, file_hash):
-        logging.debug(f"Skipping already processed file: {log_path}")
-        return 0
-    
+def drop_indexes(conn, cursor):
+    """Drop non-unique user-created indexes and return their CREATE INDEX statements.
+
+    Unique indexes are constraints rather than just lookups, so they are
+    left in place to keep rejecting duplicate rows during the import.
+    """
+    cursor.execute("SELECT name, tbl_name, sql FROM sqlite_master WHERE type='index' AND sql NOT NULL")
+    indexes = cursor.fetchall()
+    unique = set()
+    for tbl_name in {tbl_name for name, tbl_name, sql in indexes}:
+        cursor.execute(f'PRAGMA index_list("{tbl_name}")')
+        # rows are (seq, name, unique, ...)
+        unique.update(row[1] for row in cursor.fetchall() if row[2])
+    indexes = [(name, sql) for name, tbl_name, sql in indexes if name not in unique]
+
+    # drop all or none, so a failure can't lose indexes we haven't recorded
+    cursor.execute('BEGIN')
     try:
-        f = get_file_handle(log_path)
-        reader = csv.reader(f, delimiter='\t')
-        
-        # find #fields line
-        columns = []
-        for row in reader:
-            if row and row[0].startswith('#fields'):
-                columns = [col.replace('.', '_') for col in row[1:]]
-                break
+        for name, sql in indexes:
+            logging.info(f"Dropping index for bulk load: {sql}")
+            cursor.execute(f'DROP INDEX "{name}"')
+    except Exception:
+        conn.rollback()
+        raise
+    conn.commit()
+    return [sql for name, sql in indexes]
+
+def recreate_indexes(cursor, index_sql):
+    """Recreate indexes removed by drop_indexes, carrying on past failures."""
+    for sql in index_sql:
+        logging.info(f"Recreating index: {sql}")
+        try:
+            cursor.execute(sql)
+        except sqlite3.Error as e:
+            logging.error(f"Could not recreate index, run it by hand: {sql} ({e})")
+
+# Rows packed into each multi-row INSERT statement
+INSERT_BATCH_ROWS = 200
+
+# SQLite caps bound parameters per statement (999 before 3.32.0)
+MAX_SQL_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# (table_name, columns) -> (rows per statement, multi-row SQL, single-row SQL)
+_stmt_cache = {}
+
+def get_insert_statements(table_name, columns):
+    """Build (or fetch cached) multi-row and single-row INSERT statements."""
+    key = (table_name, tuple(columns))
+    stmts = _stmt_cache.get(key)
+    if stmts is None:
+        batch = max(1, min(INSERT_BATCH_ROWS, MAX_SQL_VARIABLES // len(columns)))
+        row_placeholders = '(' + ', '.join(['?' for _ in columns]) + ')'
+        col_names = ', '.join([f'"{c}"' for c in columns])
+        prefix = f'INSERT INTO "{table_name}" ({col_names}) VALUES '
+        stmts = (
+            batch,
+            prefix + ', '.join([row_placeholders] * batch) + ';',
+            prefix + row_placeholders + ';',
+        )
+        _stmt_cache[key] = stmts
+    return stmts
 
+def insert_data(cursor, table_name, columns, rows):
+    """Insert rows from any iterable (list or generator) and return how many."""
+    batch, bulk_sql, single_sql = get_insert_statements(table_name, columns)
+    rows = iter(rows)
+    count = 0
+    while True:
+        chunk = list(islice(rows, batch))
+        count += len(chunk)
+        if len(chunk) < batch:
+            # tail: fewer rows than one full statement
+            cursor.executemany(single_sql, chunk)
+            return count
+        cursor.execute(bulk_sql, list(chain.from_iterable(chunk)))
+
+def read_columns(f):
+    """Advance the file past the #fields header and return the column names."""
+    for line in f:
+        # cheap first-character test before the full prefix comparison
+        if line[0] == '#' and line.startswith('#fields\t'):
+            return [col.replace('.', '_') for col in line.rstrip('\n').split('\t')[1:]]
+    return []
+
+def fit_row(row, ncols, padding):
+    """Return a new ncols-tuple built from a short or long row."""
+    if len(row) < ncols:
+        return tuple(row) + padding[len(row):]
+    return tuple(row[:ncols])
+
+def iter_rows(f, ncols):
+    """Yield data rows, padded or truncated to match the column count.
+
+    Zeek TSV has no quoting or escaped tabs, so a plain split is enough.
+    Rows are never mutated: well-formed rows are yielded as split() returns
+    them and mismatched ones are rebuilt as fixed-size tuples.
+    """
+    padding = ('',) * ncols
+    for line in f:
+        # skip comment and blank lines
+        if line[0] not in '#\n':
+            row = line.rstrip('\n').split('\t')
+            # nearly every row already fits, so test that case only
+            if len(row) != ncols:
+                row = fit_row(row, ncols, padding)
+            yield row
+
+def parse_file_to_staging(log_path, staging_dir):
+    """Parse a log file into a temporary SQLite database.
+
+    Runs in worker processes. Returns (columns, staging_path); the rows are
+    in the staging database's "rows" table, so the writer can copy them
+    with INSERT ... SELECT instead of unpickling Python objects.
+    """
+    with get_file_handle(log_path) as f:
+        columns = read_columns(f)
         if not columns:
-            logging.warning(f"No columns found in {log_path}, skipping")
-            f.close()
-            return 0
+            return columns, None
+        fd, staging_path = tempfile.mkstemp(suffix='.db', dir=staging_dir)
+        os.close(fd)
+        try:
+            staging = sqlite3.connect(staging_path)
+            try:
+                # throwaway file: no journal, no syncing
+                staging.executescript('PRAGMA journal_mode=OFF; PRAGMA synchronous=OFF;')
+                staging.execute(table_ddl('rows', columns))
+                insert_data(staging.cursor(), 'rows', columns, iter_rows(f, len(columns)))
+                staging.commit()
+            finally:
+                staging.close()
+        except Exception:
+            os.remove(staging_path)
+            raise
+        return columns, staging_path
+
+def copy_staged_rows(cursor, alias, table_name, columns):
+    """Copy an attached staging database's rows into a table and return how many."""
+    col_names = ', '.join([f'"{c}"' for c in columns])
+    cursor.execute(f'INSERT INTO main."{table_name}" ({col_names}) '
+                   f'SELECT {col_names} FROM "{alias}".rows ORDER BY rowid;')
+    return cursor.rowcount
+
+def write_rows(conn, cursor, seen, log_path, file_hash, table_name, columns, insert):
+    """Insert a file's rows, mark it processed and return number of rows imported.
+
+    insert is called with no arguments to do the actual INSERTs and must
+    return the number of rows it inserted.
+    """
+    if not columns:
+        logging.warning(f"No columns found in {log_path}, skipping")
+        return 0
+
+    # Files share one transaction per batch; a savepoint lets a failing
+    # file roll back its own rows without discarding the rest of the batch
+    if not conn.in_transaction:
+        cursor.execute('BEGIN')
+    cursor.execute('SAVEPOINT process_file')
 
+    try:
         create_table(cursor, table_name, columns)
 
-        # read data rows
-        data = []
-        for row in reader:
-            if row and not row[0].startswith('#'):
-                # pad or truncate to match column count
-                if len(row) < len(columns):
-                    row.extend([''] * (len(columns) - len(row)))
-                elif len(row) > len(columns):
-                    row = row[:len(columns)]
-                data.append(row)
-
-        rows_imported = 0
-        if data:
-            insert_data(cursor, table_name, columns, data)
-            rows_imported = len(data)
+        rows_imported = insert()
+        if rows_imported:
             logging.info(f"{os.path.basename(log_path)}: {rows_imported} rows -> {table_name}")
         
-        f.close()
-        
         # Mark as processed
-        mark_file_processed(cursor, log_path, file_hash, rows_imported)
-        conn.commit()
+        mark_file_processed(cursor, seen, log_path, file_hash, rows_imported)
+        cursor.execute('RELEASE process_file')
         
         return rows_imported
 
+    except Exception as e:
+        logging.error(f"Error processing {log_path}: {e}", exc_info=True)
+        cursor.execute('ROLLBACK TO process_file')
+        cursor.execute('RELEASE process_file')
+        # the rollback may have undone this file's CREATE TABLE
+        _created_tables.discard((table_name, tuple(columns)))
+        return 0
+
+def write_staged(pool, conn, cursor, seen, log_path, file_hash, table_name, columns, staging_path):
+    """Import a file parsed by a worker from its staging database."""
+    if staging_path is None:
+        return write_rows(conn, cursor, seen, log_path, file_hash, table_name, columns, None)
+
+    alias = pool.attach(conn, cursor, staging_path)
+    return write_rows(conn, cursor, seen, log_path, file_hash, table_name, columns,
+                      lambda: copy_staged_rows(cursor, alias, table_name, columns))
+
+def process_file(conn, cursor, seen, log_path, table_name, hash_contents=False):
+    """Stream a single log file into the database and return number of rows imported."""
+    file_hash = get_file_signature(log_path, hash_contents)
+    
+    # Check if already processed, before opening/decompressing the file
+    if is_file_processed(seen, log_path, file_hash):
+        logging.debug(f"Skipping already processed file: {log_path}")
+        return 0
+    
+    try:
+        with get_file_handle(log_path) as f:
+            columns = read_columns(f)
+            # stream data rows straight into the INSERTs
+            return write_rows(conn, cursor, seen, log_path, file_hash, table_name, columns,
+                              lambda: insert_data(cursor, table_name, columns,
+                                                  iter_rows(f, len(columns))))
+
     except Exception as e:
         logging.error(f"Error processing {log_path}: {e}", exc_info=True)
         return 0
 
-def process_directory(conn, cursor, directory):
-    """Process all log files in a directory."""
+def attach_limit(conn):
+    """Return how many databases may be attached to the connection."""
+    if hasattr(conn, 'getlimit'):
+        return conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+    # SQLite's compiled-in default; getlimit needs Python 3.11
+    return 10
+
+def commit_batch(conn, cursor, pool=None):
+    """Commit the pending batch of files."""
+    if pool is None:
+        conn.commit()
+    else:
+        pool.commit(conn, cursor)
+
+class StagingPool:
+    """Worker processes that parse log files into temporary staging databases."""
+
+    def __init__(self, workers, staging_parent):
+        # staging files sit next to the database rather than in a possibly
+        # RAM-backed /tmp
+        self.staging_dir = tempfile.mkdtemp(prefix='.zeek-staging-', dir=staging_parent)
+        try:
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        except Exception:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            raise
+        # enough queued work to keep every worker busy while the writer copies
+        self.max_pending = workers * 2
+        # (alias, path) of staging databases attached to the main connection
+        self.attached = []
+        self.attach_count = 0
+
+    def submit(self, log_path):
+        return self.executor.submit(parse_file_to_staging, log_path, self.staging_dir)
+
+    def attach(self, conn, cursor, staging_path):
+        """Attach a staging database under a fresh alias and return the alias."""
+        if len(self.attached) >= attach_limit(conn):
+            # out of attach slots: end the batch early to free them
+            self.commit(conn, cursor)
+        self.attach_count += 1
+        alias = f'staging_{self.attach_count}'
+        cursor.execute(f'ATTACH DATABASE ? AS "{alias}"', (staging_path,))
+        # read once and thrown away; don't let the main mmap_size map it
+        cursor.execute(f'PRAGMA "{alias}".mmap_size=0')
+        self.attached.append((alias, staging_path))
+        return alias
+
+    def commit(self, conn, cursor):
+        """Commit the batch, then detach and delete its staging databases.
+
+        SQLite refuses to DETACH a database the open transaction has read,
+        so staging databases stay attached until the batch commit.
+        """
+        conn.commit()
+        for alias, staging_path in self.attached:
+            cursor.execute(f'DETACH DATABASE "{alias}"')
+            os.remove(staging_path)
+        self.attached = []
+
+    def shutdown(self):
+        self.executor.shutdown()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+def process_files_parallel(pool, conn, cursor, seen, log_files, hash_contents=False):
+    """Parse files in worker processes and write them as they complete.
+
+    Yields the number of rows imported for each file. At most
+    pool.max_pending files are in flight; all writes to the main database
+    stay on the calling thread.
+    """
+    pending = {}
+
+    def write_finished():
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            log_path, table_name, file_hash = pending.pop(future)
+            try:
+                columns, staging_path = future.result()
+            except Exception as e:
+                logging.error(f"Error processing {log_path}: {e}", exc_info=True)
+                yield 0
+                continue
+            yield write_staged(pool, conn, cursor, seen, log_path, file_hash, table_name,
+                               columns, staging_path)
+
+    for log_path, table_name in log_files:
+        file_hash = get_file_signature(log_path, hash_contents)
+        if is_file_processed(seen, log_path, file_hash):
+            logging.debug(f"Skipping already processed file: {log_path}")
+            yield 0
+            continue
+        if len(pending) >= pool.max_pending:
+            yield from write_finished()
+        pending[pool.submit(log_path)] = (log_path, table_name, file_hash)
+
+    while pending:
+        yield from write_finished()
+
+def list_log_files(directory):
+    """Return (log_path, table_name) for each log file in a directory.
+
+    Files are grouped by table so each table's b-tree stays hot in the page
+    cache; Zeek's timestamped names already sort chronologically.
+    """
+    files_by_table = defaultdict(list)
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        # skip non-log files
+        if entry.name.endswith(('.log', '.log.gz')):
+            files_by_table[extract_table_name(entry.name)].append(entry.path)
+    return [(log_path, table_name)
+            for table_name in sorted(files_by_table)
+            for log_path in files_by_table[table_name]]
+
+def has_unprocessed_files(seen, dirs, hash_contents=False):
+    """Check whether any log file in dirs still needs importing.
+
+    With hash_contents only never-seen paths count, to avoid hashing every
+    file twice; changed files at known paths are then imported with
+    indexes in place.
+    """
+    for directory in dirs:
+        if not os.path.isdir(directory):
+            continue
+        for log_path, table_name in list_log_files(directory):
+            if log_path not in seen:
+                return True
+            if not hash_contents and not is_file_processed(seen, log_path, get_file_signature(log_path)):
+                return True
+    return False
+
+# Number of files imported per transaction (with --workers, also capped by
+# how many staging databases SQLite lets us attach)
+COMMIT_EVERY_FILES = 50
+
+def process_directory(conn, cursor, seen, directory, pool=None, hash_contents=False):
+    """Process all log files in a directory, committing in batches.
+
+    With a StagingPool, files are parsed in parallel by its worker processes.
+    """
     processed = 0
     skipped = 0
     total_rows = 0
@@ -191,22 +588,24 @@ def process_directory(conn, cursor, directory):
         logging.warning(f"Not a directory: {directory}")
         return processed, skipped, total_rows
 
-    files = sorted(os.listdir(directory))
-    for filename in files:
-        # skip non-log files
-        if not (filename.endswith('.log') or filename.endswith('.log.gz')):
-            continue
-        
-        table_name = extract_table_name(filename)
-        log_path = os.path.join(directory, filename)
-        
-        rows = process_file(conn, cursor, log_path, table_name)
+    log_files = list_log_files(directory)
+
+    if pool is None:
+        results = (process_file(conn, cursor, seen, log_path, table_name, hash_contents)
+                   for log_path, table_name in log_files)
+    else:
+        results = process_files_parallel(pool, conn, cursor, seen, log_files, hash_contents)
+
+    for rows in results:
         if rows > 0:
             processed += 1
             total_rows += rows
+            if processed % COMMIT_EVERY_FILES == 0:
+                commit_batch(conn, cursor, pool)
         else:
             skipped += 1
     
+    commit_batch(conn, cursor, pool)
     return processed, skipped, total_rows
 
 def find_date_directories(logs_base_dir, days_back=None):
@@ -217,16 +616,11 @@ def find_date_directories(logs_base_dir, days_back=None):
         logging.error(f"Logs base directory does not exist: {logs_base_dir}")
         return date_dirs
     
-    for item in os.listdir(logs_base_dir):
-        item_path = os.path.join(logs_base_dir, item)
-        if os.path.isdir(item_path):
-            # Check if it matches yyyy-mm-dd format
-            try:
-                datetime.strptime(item, '%Y-%m-%d')
-                date_dirs.append(item_path)
-            except ValueError:
-                # Not a date directory, skip
-                continue
+    # DirEntry.is_dir() uses the type cached by scandir, avoiding a stat per entry
+    for entry in os.scandir(logs_base_dir):
+        # Check if it matches yyyy-mm-dd format
+        if _DATE_RE.match(entry.name) and entry.is_dir():
+            date_dirs.append(entry.path)
     
     # Sort by date (newest first)
     date_dirs.sort(reverse=True)
@@ -263,6 +657,17 @@ Examples:
                         help='Log file path (default: /var/log/zeek-to-sqlite.log)')
     parser.add_argument('--log-level', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
                         default='INFO', help='Logging level (default: INFO)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes for parsing log files; 0 uses one per CPU core minus one '
+                             '(default: 1, stream each file in the main process). Workers stage parsed '
+                             'files as temporary SQLite databases next to the database')
+    parser.add_argument('--hash-contents', action='store_true',
+                        help='Detect processed files by content hash instead of size/mtime/inode (slower)')
+    parser.add_argument('--rebuild-indexes', action='store_true',
+                        help='Drop non-unique indexes before importing new files and recreate them afterwards')
+    parser.add_argument('--durable', action='store_true',
+                        help='Use the rollback journal with full fsync instead of WAL mode '
+                             '(switches a WAL database back)')
     parser.add_argument('--directory', help='DEPRECATED: Use --logs-dir instead')
     
     args = parser.parse_args()
@@ -289,7 +694,7 @@ Examples:
     # Find directories to process
     # Check if the logs_dir itself is a date directory (yyyy-mm-dd format)
     basename = os.path.basename(args.logs_dir)
-    if re.match(r'^\d{4}-\d{2}-\d{2}$', basename):
+    if _DATE_RE.match(basename):
         # Direct date directory specified
         dirs = [args.logs_dir] if os.path.isdir(args.logs_dir) else []
     else:
@@ -309,22 +714,50 @@ Examples:
         conn = sqlite3.connect(args.database)
         cursor = conn.cursor()
         
+        # Trade a small durability window for much faster bulk inserts
+        if args.durable:
+            apply_durable_pragmas(cursor)
+        else:
+            apply_performance_pragmas(cursor)
+        
         # Initialize processed files tracking
         init_processed_files_table(cursor)
         conn.commit()
+        seen = load_processed_files(cursor)
+        
+        workers = args.workers if args.workers > 0 else max(1, (os.cpu_count() or 1) - 1)
         
         total_processed = 0
         total_skipped = 0
         total_rows = 0
         
-        # Process each directory
-        for d in dirs:
-            logger.info(f"Processing directory: {d}")
-            p, s, r = process_directory(conn, cursor, d)
-            total_processed += p
-            total_skipped += s
-            total_rows += r
-            logger.info(f"  Processed: {p} files, Skipped: {s} files, Rows: {r}")
+        # Everything that needs undoing (dropped indexes, the staging
+        # directory) is set up inside the try so the finally always cleans up
+        index_sql = []
+        pool = None
+        try:
+            # Building indexes once after the load beats updating them per row
+            if args.rebuild_indexes and has_unprocessed_files(seen, dirs, args.hash_contents):
+                index_sql = drop_indexes(conn, cursor)
+            
+            # Parse in worker processes if requested; writes stay in this process
+            if workers > 1:
+                pool = StagingPool(workers, os.path.dirname(os.path.abspath(args.database)))
+            
+            # Process each directory
+            for d in dirs:
+                logger.info(f"Processing directory: {d}")
+                p, s, r = process_directory(conn, cursor, seen, d, pool, args.hash_contents)
+                total_processed += p
+                total_skipped += s
+                total_rows += r
+                logger.info(f"  Processed: {p} files, Skipped: {s} files, Rows: {r}")
+        finally:
+            if index_sql:
+                recreate_indexes(cursor, index_sql)
+                conn.commit()
+            if pool:
+                pool.shutdown()
         
         conn.close()
         